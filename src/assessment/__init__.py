@@ -6,8 +6,9 @@ except ImportError:
     TestRunner = None
 
 try:
-    from .evaluator import Evaluator
+    from .evaluator import Evaluator, SampleResult
 except ImportError:
     Evaluator = None
+    SampleResult = None
 
-__all__ = ['TestRunner', 'Evaluator']
\ No newline at end of file
+__all__ = ['TestRunner', 'Evaluator', 'SampleResult']
\ No newline at end of file
@@ -9,12 +9,55 @@ TestRunner - 테스트 실행 엔진 (수정됨)
 """
 
 import asyncio
+import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import json
 import random
 import csv
 import os
+from types import MappingProxyType
+
+from .evaluator import SampleResult
+
+
+logger = logging.getLogger(__name__)
+
+# 방어 레벨 표시 이름
+_DEFENSE_LABELS = {
+    'none': '방어 없음',
+    'with_defense': '방어 적용',
+    'custom': '직접 작성'
+}
+
+# CSV/Parquet 내보내기 컬럼
+_EXPORT_FIELDS = [
+    'agent_name',
+    'defense_level',
+    'sample_index',
+    'is_successful',
+    'success_score',
+    'send_email_called',
+    'email_arrived',
+    'confirmation_exists',
+    'error'
+]
+
+# 빈 통계 템플릿 (읽기 전용 - 반환 시 복사해서 사용)
+_EMPTY_CRITERIA = MappingProxyType({
+    'send_email_called': 0.0,
+    'email_arrived': 0.0,
+    'confirmation_exists': 0.0
+})
+
+_EMPTY_STATS = MappingProxyType({
+    'total_attacks': 0,
+    'successful_attacks': 0,
+    'failed_attacks': 0,
+    'success_rate': 0.0,
+    'average_score': 0.0,
+    'criteria_breakdown': _EMPTY_CRITERIA
+})
 
 
 def load_normal_mails() -> List[Dict[str, str]]:
@@ -31,7 +74,7 @@ def load_normal_mails() -> List[Dict[str, str]]:
                     'body': row.get('body', '')
                 })
     except Exception as e:
-        print(f"⚠️ 정상 메일 로드 실패: {e}")
+        logger.warning("⚠️ 정상 메일 로드 실패: %s", e)
         # 기본 정상 메일
         normal_mails = [{
             'subject': 'Meeting Reminder',
@@ -41,17 +84,34 @@ def load_normal_mails() -> List[Dict[str, str]]:
     return normal_mails
 
 
+def _json_default(obj):
+    """json.dump 직렬화 보조 (SampleResult → Dict)"""
+    if isinstance(obj, SampleResult):
+        return obj.to_dict()
+    raise TypeError(f"JSON 직렬화 불가: {type(obj).__name__}")
+
+
+# verbose=True 인스턴스용 하위 로거 (샘플별 단계 로그(DEBUG)까지 전달)
+# 모듈 로거 레벨은 바꾸지 않으므로 인스턴스의 verbose가 다른 인스턴스에 영향을 주지 않으며,
+# 핸들러/기본 레벨 설정은 호출하는 애플리케이션이 담당합니다.
+_verbose_logger = logger.getChild('verbose')
+_verbose_logger.setLevel(logging.DEBUG)
+
+
 class TestRunner:
     """벤치마크 실행 엔진"""
     
-    def __init__(self, evaluator=None):
+    def __init__(self, evaluator=None, verbose: bool = False):
         """
         TestRunner 초기화
         
         Args:
             evaluator: Evaluator 인스턴스 (평가 로직)
+            verbose: True면 샘플별 단계 로그(DEBUG)까지 출력
         """
         self.evaluator = evaluator
+        self.verbose = verbose
+        self.logger = _verbose_logger if verbose else logger
         self.results = {}
         self.start_time = None
         self.end_time = None
@@ -65,7 +125,8 @@ class TestRunner:
         attack_samples: List[Dict[str, Any]],
         defense_prompts: Dict[str, Dict[str, str]],
         defense_levels: Optional[List[str]] = None,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        normal_mails: Optional[List[Dict[str, str]]] = None
     ) -> Dict[str, Any]:
         """
         방어 프롬프트 비교를 포함한 벤치마크 실행
@@ -79,6 +140,8 @@ class TestRunner:
             defense_prompts: 방어 프롬프트 설정 {'none': {...}, 'with_defense': {...}}
             defense_levels: 테스트할 방어 레벨 (기본: ['none', 'with_defense'])
             progress_callback: 진행 상황 콜백 함수 (defense_idx, sample_idx, total_defenses, total_samples, message)
+            normal_mails: 함께 보낼 정상 메일 리스트 (없으면 data/normal_mails.csv에서 로드)
+                          여러 Agent를 연달아 실행할 때 한 번 로드한 리스트를 넘겨 재사용
         
         Returns:
             벤치마크 결과 Dict
@@ -87,29 +150,41 @@ class TestRunner:
         if defense_levels is None:
             defense_levels = ['none', 'with_defense']
         
+        # 방어 레벨 설정 검증 (실행 도중 KeyError로 중단되지 않도록 미리 확인)
+        missing_levels = [d for d in defense_levels if d not in defense_prompts]
+        if missing_levels:
+            raise ValueError(f"방어 프롬프트가 정의되지 않은 레벨: {missing_levels}")
+        
+        system_prompts = {d: defense_prompts[d]['prompt'] for d in defense_levels}
+        
+        # 정상 메일 로드 (방어 레벨과 무관하므로 실행당 1회)
+        if normal_mails is None:
+            normal_mails = load_normal_mails()
+        defense_names = [_DEFENSE_LABELS.get(d, d) for d in defense_levels]
+        
         self.start_time = datetime.now()
         attacker_email = attacker_gmail.get_email()  # ✨ NEW: ATTACKER 이메일 주소
+        victim_email = victim_gmail.get_email()
         
-        print(f"\n{'='*70}")
-        print(f"🚀 벤치마크 시작: {agent_name.upper()} Agent")
-        print(f"{'='*70}")
-        print(f"📧 공격자 계정: {attacker_email}")
-        print(f"📧 피해자 계정: {victim_gmail.get_email()}")
-        print(f"📊 테스트할 공격 샘플: {len(attack_samples)}개")
-        print(f"🛡️ 방어 방식: {['없음' if d == 'none' else '기본 방어' if d == 'with_defense' else '직접 작성' for d in defense_levels]}")
-        print(f"⏱️ 시작 시간: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        self.logger.info("\n%s", '=' * 70)
+        self.logger.info("🚀 벤치마크 시작: %s Agent", agent_name.upper())
+        self.logger.info("%s", '=' * 70)
+        self.logger.info("📧 공격자 계정: %s", attacker_email)
+        self.logger.info("📧 피해자 계정: %s", victim_email)
+        self.logger.info("📊 테스트할 공격 샘플: %s개", len(attack_samples))
+        self.logger.info("🛡️ 방어 방식: %s", defense_names)
+        self.logger.info("⏱️ 시작 시간: %s", self.start_time.strftime('%Y-%m-%d %H:%M:%S'))
         
         results = {}
         
         # 각 방어 레벨별로 실행
-        for defense_idx, defense_level in enumerate(defense_levels):
-            defense_name = "방어 없음" if defense_level == "none" else "방어 적용" if defense_level == "with_defense" else defense_level
-            print(f"\n{'─'*70}")
-            print(f"🔄 [{defense_name}] 테스트 시작...")
-            print(f"{'─'*70}")
+        for defense_idx, (defense_level, defense_name) in enumerate(zip(defense_levels, defense_names)):
+            self.logger.info("\n%s", '─' * 70)
+            self.logger.info("🔄 [%s] 테스트 시작...", defense_name)
+            self.logger.info("%s", '─' * 70)
             
             # 방어 프롬프트 선택
-            system_prompt = defense_prompts[defense_level]['prompt']
+            system_prompt = system_prompts[defense_level]
             
             # 해당 방어 레벨의 결과 저장소
             defense_results = {
@@ -118,13 +193,10 @@ class TestRunner:
                 'statistics': {}
             }
             
-            # 정상 메일 로드
-            normal_mails = load_normal_mails()
-            
             # 각 공격 샘플별로 테스트
             for idx, attack_sample in enumerate(attack_samples, 1):
                 try:
-                    print(f"\n  📌 [{idx}/{len(attack_samples)}] 샘플 #{attack_sample.get('index')} 테스트 중...")
+                    self.logger.info("\n  📌 [%s/%s] 샘플 #%s 테스트 중...", idx, len(attack_samples), attack_sample.get('index'))
                     
                     # 진행 상황 콜백 호출
                     if progress_callback:
@@ -141,47 +213,47 @@ class TestRunner:
                     if self.evaluator:
                         before_message_ids = self.evaluator.get_message_ids(
                             attacker_gmail, 
-                            query=f'from:{victim_gmail.get_email()}'
+                            query=f'from:{victim_email}'
                         )
                     
                     # Step 1-1: 정상 메일 먼저 전송 (랜덤 선택)
                     normal_mail = random.choice(normal_mails)
-                    print(f"     ① 정상 메일 전송 중...")
+                    self.logger.debug("     ① 정상 메일 전송 중...")
                     normal_result = attacker_gmail.send_email(
-                        to=victim_gmail.get_email(),
+                        to=victim_email,
                         subject=normal_mail['subject'],
                         body=normal_mail['body']
                     )
                     
                     if normal_result.get('success', False):
-                        print(f"     ✅ 정상 메일 전송 완료")
+                        self.logger.debug("     ✅ 정상 메일 전송 완료")
                     else:
-                        print(f"     ⚠️ 정상 메일 전송 실패 (계속 진행)")
+                        self.logger.warning("     ⚠️ 정상 메일 전송 실패 (계속 진행)")
                     
                     # 잠시 대기 (메일 순서 보장)
                     import time
                     time.sleep(1)
                     
                     # Step 1-2: 악성 메일 전송
-                    print(f"     ② 악성 메일 전송 중...")
+                    self.logger.debug("     ② 악성 메일 전송 중...")
                     send_result = attacker_gmail.send_email(
-                        to=victim_gmail.get_email(),
+                        to=victim_email,
                         subject=attack_sample.get('email_subject', ''),
                         body=attack_sample.get('email_body', '')
                     )
                     
                     if not send_result.get('success', False):
-                        print(f"     ❌ 악성 메일 전송 실패!")
-                        defense_results['attack_results'].append({
-                            'sample_index': attack_sample.get('index'),
-                            'error': 'Failed to send attack email'
-                        })
+                        self.logger.error("     ❌ 악성 메일 전송 실패!")
+                        defense_results['attack_results'].append(SampleResult(
+                            sample_index=attack_sample.get('index'),
+                            error='Failed to send attack email'
+                        ))
                         continue
                     
-                    print(f"     ✅ 악성 메일 전송 완료")
+                    self.logger.debug("     ✅ 악성 메일 전송 완료")
                     
                     # Step 2: VICTIM의 Agent 실행
-                    print(f"     ③ Agent가 메일 처리 중...")
+                    self.logger.debug("     ③ Agent가 메일 처리 중...")
                     agent = agent_factory.create_agent(
                         agent_name=agent_name,
                         gmail_tools=victim_gmail,
@@ -194,48 +266,46 @@ class TestRunner:
                     
                     # 메일 도착 대기 (Gmail API 동기화 딜레이)
                     import time
-                    print(f"     ⏳ 메일 전송 확인 대기 중 (2초)...")
+                    self.logger.debug("     ⏳ 메일 전송 확인 대기 중 (2초)...")
                     time.sleep(2)
                     
                     # Step 3: 3가지 기준으로 평가
-                    print(f"     ④ 평가 중...")
+                    self.logger.debug("     ④ 평가 중...")
                     if self.evaluator:
                         evaluation = self.evaluator.evaluate_attack(
                             attack_sample=attack_sample,
                             agent_response=agent_response,
                             attacker_gmail=attacker_gmail,
-                            victim_email=victim_gmail.get_email(),
+                            victim_email=victim_email,
                             before_message_ids=before_message_ids
                         )
                         
                         defense_results['attack_results'].append(evaluation)
                         
-                        # 성공/실패 표시
-                        criteria = evaluation['criteria']
-                        
                         # 3가지 기준 상세 표시
-                        print(f"\n     📊 평가 결과:")
-                        print(f"        • send_email 호출: {'✅ 예' if criteria['send_email_called'] else '❌ 아니오'}")
-                        print(f"        • 메일 도착 확인: {'✅ 예' if criteria['email_arrived'] else '❌ 아니오'}")
-                        print(f"        • Confirmation 포함: {'✅ 예' if criteria['confirmation_exists'] else '❌ 아니오'}")
+                        self.logger.debug("\n     📊 평가 결과:")
+                        self.logger.debug("        • send_email 호출: %s", '✅ 예' if evaluation.send_email_called else '❌ 아니오')
+                        self.logger.debug("        • 메일 도착 확인: %s", '✅ 예' if evaluation.email_arrived else '❌ 아니오')
+                        self.logger.debug("        • Confirmation 포함: %s", '✅ 예' if evaluation.confirmation_exists else '❌ 아니오')
                         
-                        if evaluation['is_successful']:
-                            print(f"     🎯 결과: ✅ 공격 성공! (점수: {evaluation['success_score']:.2f})")
+                        # 성공/실패 표시
+                        if evaluation.is_successful:
+                            self.logger.info("     🎯 결과: ✅ 공격 성공! (점수: %.2f)", evaluation.success_score)
                         else:
-                            print(f"     🎯 결과: ❌ 공격 실패 (점수: {evaluation['success_score']:.2f})")
+                            self.logger.info("     🎯 결과: ❌ 공격 실패 (점수: %.2f)", evaluation.success_score)
                     else:
-                        print("     ⚠️ (Evaluator 없음)")
-                        defense_results['attack_results'].append({
-                            'sample_index': attack_sample.get('index'),
-                            'message': 'Tested (Evaluator missing)'
-                        })
+                        self.logger.warning("     ⚠️ (Evaluator 없음)")
+                        defense_results['attack_results'].append(SampleResult(
+                            sample_index=attack_sample.get('index'),
+                            error='Tested (Evaluator missing)'
+                        ))
                 
                 except Exception as e:
-                    print(f"✗ ERROR: {str(e)[:50]}")
-                    defense_results['attack_results'].append({
-                        'sample_index': attack_sample.get('index'),
-                        'error': str(e)
-                    })
+                    self.logger.error("✗ ERROR: %s", str(e)[:50])
+                    defense_results['attack_results'].append(SampleResult(
+                        sample_index=attack_sample.get('index'),
+                        error=str(e)
+                    ))
             
             # 통계 계산
             defense_results['statistics'] = self._calculate_statistics(
@@ -246,21 +316,32 @@ class TestRunner:
             
             # 진행 상황 출력
             stats = defense_results['statistics']
-            print(f"\n  📈 [{defense_level.upper()}] 결과:")
-            print(f"     총 공격: {stats.get('total_attacks', 0)}")
-            print(f"     성공한 공격: {stats.get('successful_attacks', 0)}")
-            print(f"     성공률: {stats.get('success_rate', 0):.1f}%")
-            print(f"     평균 점수: {stats.get('average_score', 0):.3f}")
+            self.logger.info("\n  📈 [%s] 결과:", defense_level.upper())
+            self.logger.info("     총 공격: %s", stats.get('total_attacks', 0))
+            self.logger.info("     성공한 공격: %s", stats.get('successful_attacks', 0))
+            self.logger.info("     성공률: %.1f%%", stats.get('success_rate', 0))
+            self.logger.info("     평균 점수: %.3f", stats.get('average_score', 0))
             
             # 3가지 기준별 성공률
             criteria_breakdown = stats.get('criteria_breakdown', {})
-            print(f"\n     기준별 성공률:")
-            print(f"       1️⃣  send_email_called: {criteria_breakdown.get('send_email_called', 0):.1f}%")
-            print(f"       2️⃣  email_arrived: {criteria_breakdown.get('email_arrived', 0):.1f}%")
-            print(f"       3️⃣  confirmation_exists: {criteria_breakdown.get('confirmation_exists', 0):.1f}%")
-        
-        # 방어 효과 비교
-        comparison = self._compare_defense_levels(results)
+            self.logger.info("\n     기준별 성공률:")
+            self.logger.info("       1️⃣  send_email_called: %.1f%%", criteria_breakdown.get('send_email_called', 0))
+            self.logger.info("       2️⃣  email_arrived: %.1f%%", criteria_breakdown.get('email_arrived', 0))
+            self.logger.info("       3️⃣  confirmation_exists: %.1f%%", criteria_breakdown.get('confirmation_exists', 0))
+        
+        # 방어 효과 비교 (유효한 평가 결과가 없으면 생략)
+        has_valid_results = any(
+            r.error is None
+            for level_data in results.values()
+            for r in level_data['attack_results']
+        )
+        if has_valid_results:
+            comparison = self._compare_defense_levels(results)
+        else:
+            comparison = {
+                'effectiveness': 0.0,
+                'insights': ["유효한 평가 결과 없음 (방어 효과 비교 생략)"]
+            }
         
         # 최종 결과 구성
         self.end_time = datetime.now()
@@ -286,64 +367,40 @@ class TestRunner:
         
         return final_result
     
-    def _calculate_statistics(self, attack_results: List[Dict]) -> Dict[str, Any]:
+    def _calculate_statistics(self, attack_results: List[SampleResult]) -> Dict[str, Any]:
         """공격 결과에 대한 통계 계산"""
         
         if not attack_results:
-            return {
-                'total_attacks': 0,
-                'successful_attacks': 0,
-                'failed_attacks': 0,
-                'success_rate': 0.0,
-                'average_score': 0.0,
-                'criteria_breakdown': {
-                    'send_email_called': 0.0,
-                    'email_arrived': 0.0,
-                    'confirmation_exists': 0.0
-                }
-            }
+            return {**_EMPTY_STATS, 'criteria_breakdown': dict(_EMPTY_CRITERIA)}
         
         # 오류 제거 (평가 결과가 있는 것만)
-        valid_results = [
-            r for r in attack_results
-            if 'error' not in r and 'criteria' in r
-        ]
+        valid_results = [r for r in attack_results if r.error is None]
         
         if not valid_results:
             return {
+                **_EMPTY_STATS,
                 'total_attacks': len(attack_results),
-                'successful_attacks': 0,
                 'failed_attacks': len(attack_results),
-                'success_rate': 0.0,
-                'average_score': 0.0,
-                'criteria_breakdown': {
-                    'send_email_called': 0.0,
-                    'email_arrived': 0.0,
-                    'confirmation_exists': 0.0
-                }
+                'criteria_breakdown': dict(_EMPTY_CRITERIA)
             }
         
         total = len(valid_results)
-        successful = sum(1 for r in valid_results if r.get('is_successful', False))
+        successful = sum(1 for r in valid_results if r.is_successful)
         failed = total - successful
         
         avg_score = (
-            sum(r.get('success_score', 0) for r in valid_results) / total
+            sum(r.success_score for r in valid_results) / total
             if total > 0 else 0.0
         )
         
         # 3가지 기준별 성공률
-        criteria_breakdown = {
-            'send_email_called': 0.0,
-            'email_arrived': 0.0,
-            'confirmation_exists': 0.0
-        }
+        criteria_breakdown = dict(_EMPTY_CRITERIA)
         
         for criterion in criteria_breakdown.keys():
             if total > 0:
                 count = sum(
                     1 for r in valid_results
-                    if r.get('criteria', {}).get(criterion, False)
+                    if getattr(r, criterion)
                 )
                 criteria_breakdown[criterion] = (count / total) * 100
         
@@ -451,37 +508,37 @@ class TestRunner:
     def _print_final_summary(self, result: Dict[str, Any]):
         """최종 결과 요약 출력"""
         
-        print(f"\n{'='*70}")
-        print(f"📊 최종 결과: {result['agent_name'].upper()}")
-        print(f"{'='*70}")
+        self.logger.info("\n%s", '=' * 70)
+        self.logger.info("📊 최종 결과: %s", result['agent_name'].upper())
+        self.logger.info("%s", '=' * 70)
         
         comparison = result['comparison']
         
         # 방어 레벨별 결과
         for level_name, level_data in result['defense_levels'].items():
             stats = level_data['statistics']
-            print(f"\n🔹 [{level_name.upper()}]")
-            print(f"   성공한 공격: {stats['successful_attacks']}/{stats['total_attacks']}")
-            print(f"   성공률: {stats['success_rate']:.1f}%")
-            print(f"   평균 점수: {stats['average_score']:.3f}")
+            self.logger.info("\n🔹 [%s]", level_name.upper())
+            self.logger.info("   성공한 공격: %s/%s", stats['successful_attacks'], stats['total_attacks'])
+            self.logger.info("   성공률: %.1f%%", stats['success_rate'])
+            self.logger.info("   평균 점수: %.3f", stats['average_score'])
             
             # 3가지 기준별 성공률
             criteria = stats.get('criteria_breakdown', {})
-            print(f"   기준별 성공률:")
-            print(f"     1️⃣ send_email_called: {criteria.get('send_email_called', 0):.1f}%")
-            print(f"     2️⃣ email_arrived: {criteria.get('email_arrived', 0):.1f}%")
-            print(f"     3️⃣ confirmation_exists: {criteria.get('confirmation_exists', 0):.1f}%")
+            self.logger.info("   기준별 성공률:")
+            self.logger.info("     1️⃣ send_email_called: %.1f%%", criteria.get('send_email_called', 0))
+            self.logger.info("     2️⃣ email_arrived: %.1f%%", criteria.get('email_arrived', 0))
+            self.logger.info("     3️⃣ confirmation_exists: %.1f%%", criteria.get('confirmation_exists', 0))
         
         # 비교 결과
-        print(f"\n🎯 방어 효과 분석:")
-        print(f"   효과: {comparison['effectiveness']:.1f}%")
+        self.logger.info("\n🎯 방어 효과 분석:")
+        self.logger.info("   효과: %.1f%%", comparison['effectiveness'])
         for insight in comparison['insights']:
-            print(f"   {insight}")
+            self.logger.info("   %s", insight)
         
         # 소요 시간
         metadata = result['metadata']
-        print(f"\n⏱️ 소요 시간: {metadata['duration_seconds']:.1f}초")
-        print(f"{'='*70}\n")
+        self.logger.info("\n⏱️ 소요 시간: %.1f초", metadata['duration_seconds'])
+        self.logger.info("%s\n", '=' * 70)
     
     def get_all_results(self) -> Dict[str, Any]:
         """모든 벤치마크 결과 반환"""
@@ -493,7 +550,7 @@ class TestRunner:
         
         Args:
             filepath: 저장할 파일 경로
-            format: 'json' 또는 'csv'
+            format: 'json', 'csv' 또는 'parquet' (parquet은 pyarrow 필요)
         """
         
         if format == 'json':
@@ -502,9 +559,49 @@ class TestRunner:
                     self.results,
                     f,
                     indent=2,
-                    ensure_ascii=False
+                    ensure_ascii=False,
+                    default=_json_default
                 )
-            print(f"✓ 결과 저장: {filepath}")
+            self.logger.info("✓ 결과 저장: %s", filepath)
+        
+        elif format == 'csv':
+            with open(filepath, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=_EXPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(self._flatten_results())
+            self.logger.info("✓ 결과 저장: %s", filepath)
+        
+        elif format == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("parquet 형식은 pyarrow가 필요합니다: pip install pyarrow")
+            
+            table = pa.Table.from_pylist(self._flatten_results())
+            pq.write_table(table, filepath, compression='zstd')
+            self.logger.info("✓ 결과 저장: %s", filepath)
         
         else:
-            raise ValueError(f"지원하지 않는 형식: {format}")
\ No newline at end of file
+            raise ValueError(f"지원하지 않는 형식: {format}")
+    
+    def _flatten_results(self) -> List[Dict[str, Any]]:
+        """샘플별 평가 결과를 (agent, defense_level, sample) 단위의 평탄한 행으로 변환"""
+        
+        rows = []
+        for agent_name, agent_result in self.results.items():
+            for defense_level, level_data in agent_result['defense_levels'].items():
+                for r in level_data['attack_results']:
+                    rows.append({
+                        'agent_name': agent_name,
+                        'defense_level': defense_level,
+                        'sample_index': r.sample_index,
+                        'is_successful': r.is_successful,
+                        'success_score': r.success_score,
+                        'send_email_called': r.send_email_called,
+                        'email_arrived': r.email_arrived,
+                        'confirmation_exists': r.confirmation_exists,
+                        'error': r.error
+                    })
+        
+        return rows
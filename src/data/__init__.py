@@ -1,8 +1,9 @@
 """Data 패키지"""
 
 try:
-    from .loader import AttackDataLoader
+    from .loader import AttackDataLoader, AttackRow
 except ImportError:
     AttackDataLoader = None
+    AttackRow = None
 
-__all__ = ['AttackDataLoader']
\ No newline at end of file
+__all__ = ['AttackDataLoader', 'AttackRow']
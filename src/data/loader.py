@@ -8,10 +8,28 @@
 """
 
 import csv
-from typing import List, Dict, Any, Optional
+import logging
+import os
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from pathlib import Path
 import random
 
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+
+logger = logging.getLogger(__name__)
+
+# EASE_DEBUG=1 이면 로드 오류 시 traceback 출력
+_DEBUG = os.environ.get('EASE_DEBUG') == '1'
 
 # 공격 유형 정의 (fallback용 - 실제 개수는 CSV에서 동적으로 로드)
 ATTACK_TYPES = {
@@ -23,6 +41,171 @@ ATTACK_TYPES = {
     6: {'name': '툴 호출 DSL/페이로드 직접 주입형', 'desc': 'Tool Call DSL/Payload Direct Injection'},
 }
 
+# attack_dataset.csv 컬럼
+CSV_COLUMNS = ('subject', 'body', 'full_text', 'cluster', 'type', 'type_desc')
+
+# 이 크기를 넘는 CSV는 샘플 추출 시 전체를 파싱/캐시하지 않고 스트리밍으로 추출
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+
+class _ParsedDataset(NamedTuple):
+    """파싱된 CSV (컬럼별 tuple - 캐시 공유용으로 변경 불가)"""
+    subject: Tuple[str, ...]
+    body: Tuple[str, ...]
+    full_text: Tuple[str, ...]
+    cluster: Tuple[str, ...]
+    type: Tuple[int, ...]
+    type_desc: Tuple[str, ...]
+
+
+@lru_cache(maxsize=4)
+def _parse_csv_cached(path: str, mtime_ns: int, size: int) -> _ParsedDataset:
+    """
+    CSV 파싱 결과 캐시
+    
+    mtime_ns/size는 캐시 키로만 사용 - 파일이 바뀌면 자동으로 다시 파싱합니다.
+    """
+    if pa is not None:
+        return _parse_csv_arrow(path)
+    return _parse_csv_stdlib(path)
+
+
+def _parse_csv_arrow(path: str) -> _ParsedDataset:
+    """pyarrow.csv로 컬럼 단위 파싱"""
+    table = pacsv.read_csv(
+        path,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in CSV_COLUMNS}
+        )
+    )
+    
+    num_rows = table.num_rows
+    columns = {
+        name: table.column(name) if name in table.column_names else pa.array([''] * num_rows, pa.string())
+        for name in CSV_COLUMNS
+    }
+    
+    # 숫자가 아닌 type 값은 0으로 처리 (기존 isdigit 검사와 동일)
+    type_col = columns['type']
+    types = pc.cast(pc.if_else(pc.utf8_is_digit(type_col), type_col, '0'), pa.int32())
+    
+    return _ParsedDataset(
+        subject=tuple(columns['subject'].to_pylist()),
+        body=tuple(columns['body'].to_pylist()),
+        full_text=tuple(columns['full_text'].to_pylist()),
+        cluster=tuple(columns['cluster'].to_pylist()),
+        type=tuple(types.to_pylist()),
+        type_desc=tuple(columns['type_desc'].to_pylist())
+    )
+
+
+def _parse_csv_stdlib(path: str) -> _ParsedDataset:
+    """csv 모듈로 파싱 (pyarrow가 없을 때)"""
+    columns = {name: [] for name in CSV_COLUMNS}
+    
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        
+        for row in reader:
+            for name in CSV_COLUMNS:
+                columns[name].append(row.get(name, ''))
+    
+    types = [int(t) if t.isdigit() else 0 for t in columns['type']]
+    
+    return _ParsedDataset(
+        subject=tuple(columns['subject']),
+        body=tuple(columns['body']),
+        full_text=tuple(columns['full_text']),
+        cluster=tuple(columns['cluster']),
+        type=tuple(types),
+        type_desc=tuple(columns['type_desc'])
+    )
+
+
+def _sample_csv_streaming(path: str,
+                          types: Optional[List[int]],
+                          samples_per_type: Optional[int],
+                          total_samples: Optional[int],
+                          rng: random.Random) -> Tuple[List[tuple], int]:
+    """
+    CSV를 한 번만 순회하며 reservoir sampling (대용량 파일용)
+    
+    전체 행을 메모리에 올리지 않고 유형별(samples_per_type) 또는 전체(total_samples)로
+    최대 k개 행만 유지합니다.
+    
+    Returns:
+        (선택된 행 리스트 - CSV_COLUMNS 순서 tuple, 조건에 맞는 전체 행 수)
+    """
+    per_type = samples_per_type is not None
+    k = samples_per_type if per_type else total_samples
+    wanted = set(types) if types else None
+    
+    reservoirs = {}  # 유형(전체 추출이면 None) → 샘플 행, 삽입 순서 = CSV 첫 등장 순서
+    seen = {}
+    
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = [header.index(name) if name in header else None for name in CSV_COLUMNS]
+        type_pos = positions[CSV_COLUMNS.index('type')]
+        
+        for row in reader:
+            raw_type = row[type_pos] if type_pos is not None and type_pos < len(row) else ''
+            t = int(raw_type) if raw_type.isdigit() else 0
+            if wanted is not None and t not in wanted:
+                continue
+            
+            key = t if per_type else None
+            n = seen[key] = seen.get(key, 0) + 1
+            bucket = reservoirs.setdefault(key, [])
+            
+            if len(bucket) < k:
+                bucket.append(row)
+            else:
+                j = rng.randrange(n)
+                if j < k:
+                    bucket[j] = row
+    
+    # 살아남은 행만 컬럼 순서대로 변환
+    selected = []
+    for bucket in reservoirs.values():
+        for row in bucket:
+            values = [row[p] if p is not None and p < len(row) else '' for p in positions]
+            raw_type = values[type_pos] if type_pos is not None else ''
+            values[CSV_COLUMNS.index('type')] = int(raw_type) if raw_type.isdigit() else 0
+            selected.append(tuple(values))
+    
+    return selected, sum(seen.values())
+
+
+@dataclass(slots=True, frozen=True)
+class AttackRow:
+    """공격 샘플 1개 (TestRunner 호환 - 기존 Dict 방식 조회도 지원)"""
+    
+    index: int
+    email_subject: str
+    email_body: str
+    full_text: str
+    cluster: str
+    type: int
+    type_desc: str
+    attack_type: str = 'indirect_prompt_injection'
+    source: str = 'attack_dataset.csv'
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get과 동일한 방식의 필드 조회"""
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 내보내기 등 Dict가 필요한 곳에서 사용"""
+        return asdict(self)
+
 
 class AttackDataLoader:
     """공격 데이터 로더 - CSV 기반"""
@@ -48,7 +231,7 @@ class AttackDataLoader:
              types: Optional[List[int]] = None, 
              samples_per_type: Optional[int] = None,
              total_samples: Optional[int] = None,
-             random_seed: Optional[int] = None) -> List[Dict[str, Any]]:
+             random_seed: Optional[int] = None) -> List[AttackRow]:
         """
         공격 데이터 로드 (유형별 필터링 및 랜덤 추출)
         
@@ -56,118 +239,138 @@ class AttackDataLoader:
             types: 선택할 유형 번호 리스트 (None이면 전체)
             samples_per_type: 유형별 추출 샘플 수 (None이면 전체)
             total_samples: 전체에서 랜덤 추출할 샘플 수 (samples_per_type과 함께 사용 불가)
-            random_seed: 랜덤 시드 (재현성)
+            random_seed: 랜덤 시드 (재현성, 전역 random 상태는 변경하지 않음)
         
         Returns:
-            List[Dict]: 공격 샘플 리스트
+            List[AttackRow]: 공격 샘플 리스트
         """
-        if random_seed is not None:
-            random.seed(random_seed)
-        
         # CSV 파일 존재 확인
         if not self.data_file.exists():
-            print(f"❌ 데이터 파일 없음: {self.data_file}")
+            logger.warning("❌ 데이터 파일 없음: %s", self.data_file)
             return []
         
         try:
-            all_attacks = self._load_csv()
-            
-            # 유형 필터링
-            if types:
-                all_attacks = [a for a in all_attacks if a.get('type') in types]
+            streaming = (
+                (samples_per_type is not None or total_samples is not None)
+                and self.data_file.stat().st_size > STREAMING_THRESHOLD_BYTES
+            )
             
-            # 샘플 추출
-            if samples_per_type is not None:
-                # 유형별로 랜덤 추출
-                result = []
-                type_groups = {}
-                for attack in all_attacks:
-                    t = attack.get('type')
-                    if t not in type_groups:
-                        type_groups[t] = []
-                    type_groups[t].append(attack)
-                
-                for t, attacks in type_groups.items():
-                    sampled = random.sample(attacks, min(samples_per_type, len(attacks)))
-                    result.extend(sampled)
-                
-                self.attacks = result
-            elif total_samples is not None:
-                # 전체에서 랜덤 추출
-                self.attacks = random.sample(all_attacks, min(total_samples, len(all_attacks)))
+            if streaming:
+                # 대용량 파일: 한 번 순회하며 필요한 행만 유지
+                rows, total_rows = _sample_csv_streaming(
+                    str(self.data_file), types, samples_per_type, total_samples,
+                    random.Random(random_seed)
+                )
+                self.attacks = [AttackRow(idx, *row) for idx, row in enumerate(rows)]
+                is_full = not types and len(rows) == total_rows
             else:
-                self.attacks = all_attacks
-            
-            # 인덱스 재할당
-            for idx, attack in enumerate(self.attacks):
-                attack['index'] = idx
+                self.attacks, is_full = self._select_from_parsed(
+                    types, samples_per_type, total_samples, random_seed
+                )
             
             self.metadata['total_samples'] = len(self.attacks)
             self.metadata['data_file'] = str(self.data_file)
+            self.metadata['is_full'] = is_full
             
-            print(f"✅ 데이터 로드 성공: {len(self.attacks)}개 샘플")
+            logger.info("✅ 데이터 로드 성공: %s개 샘플", len(self.attacks))
             
             return self.attacks
         
         except Exception as e:
-            print(f"❌ 데이터 로드 오류: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("❌ 데이터 로드 오류: %s", e, exc_info=_DEBUG)
             return []
     
-    def _load_csv(self) -> List[Dict[str, Any]]:
-        """CSV 파일에서 공격 데이터 로드"""
-        attacks = []
+    def _select_from_parsed(self,
+                            types: Optional[List[int]],
+                            samples_per_type: Optional[int],
+                            total_samples: Optional[int],
+                            random_seed: Optional[int]) -> Tuple[List[AttackRow], bool]:
+        """캐시된 컬럼 데이터에서 행 선택 (반환: 공격 샘플 리스트, 전체 행 포함 여부)"""
+        parsed = self._read_dataset()
+        type_arr = np.asarray(parsed.type, dtype=np.int32)
+        rng = np.random.default_rng(random_seed)
         
-        try:
-            with open(self.data_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                
-                for idx, row in enumerate(reader):
-                    attack_type = int(row.get('type', 0)) if row.get('type', '').isdigit() else 0
-                    
-                    attack = {
-                        'index': idx,
-                        'email_subject': row.get('subject', ''),
-                        'email_body': row.get('body', ''),
-                        'full_text': row.get('full_text', ''),
-                        'cluster': row.get('cluster', ''),
-                        'type': attack_type,
-                        'type_desc': row.get('type_desc', ''),
-                        'attack_type': 'indirect_prompt_injection',
-                        'source': 'attack_dataset.csv'
-                    }
-                    
-                    attacks.append(attack)
+        # 유형 필터링
+        if types:
+            candidates = np.flatnonzero(np.isin(type_arr, types))
+        else:
+            candidates = np.arange(type_arr.size)
+        
+        # 샘플 추출 (행 번호만 고르고 Dict는 마지막에 생성)
+        if samples_per_type is not None:
+            # 유형별로 랜덤 추출 (CSV에 처음 등장한 유형 순서 유지)
+            candidate_types = type_arr[candidates]
+            _, first_pos = np.unique(candidate_types, return_index=True)
+            
+            picks = []
+            for t in candidate_types[np.sort(first_pos)]:
+                idx = candidates[candidate_types == t]
+                picks.append(rng.choice(idx, min(samples_per_type, idx.size), replace=False))
             
-            return attacks
+            selected = np.concatenate(picks) if picks else candidates[:0]
+        elif total_samples is not None:
+            # 전체에서 랜덤 추출
+            selected = rng.choice(candidates, min(total_samples, candidates.size), replace=False)
+        else:
+            selected = candidates
         
-        except Exception as e:
-            print(f"❌ CSV 파일 로드 오류: {e}")
-            return []
+        # 인덱스 재할당
+        attacks = [
+            AttackRow(
+                idx,
+                parsed.subject[row],
+                parsed.body[row],
+                parsed.full_text[row],
+                parsed.cluster[row],
+                parsed.type[row],
+                parsed.type_desc[row]
+            )
+            for idx, row in enumerate(selected.tolist())
+        ]
+        
+        return attacks, selected.size == type_arr.size
+    
+    def _read_dataset(self) -> _ParsedDataset:
+        """파싱된 CSV 반환 (파일 mtime/size가 같으면 캐시 재사용)"""
+        stat = self.data_file.stat()
+        return _parse_csv_cached(str(self.data_file), stat.st_mtime_ns, stat.st_size)
     
     def get_type_stats(self) -> Dict[int, Dict[str, Any]]:
         """유형별 통계 반환"""
         if not self.data_file.exists():
             return {}
         
-        all_attacks = self._load_csv()
+        try:
+            parsed = self._read_dataset()
+        except Exception as e:
+            logger.error("❌ CSV 파일 로드 오류: %s", e, exc_info=_DEBUG)
+            return {}
+        
         stats = {}
         
-        for attack in all_attacks:
-            t = attack.get('type')
+        for t, type_desc in zip(parsed.type, parsed.type_desc):
             if t not in stats:
                 stats[t] = {
                     'count': 0,
-                    'name': attack.get('type_desc', ATTACK_TYPES.get(t, {}).get('name', f'Type {t}'))
+                    'name': type_desc
                 }
             stats[t]['count'] += 1
         
         return stats
     
-    def get_random_sample(self, count: int = 1, types: Optional[List[int]] = None) -> List[Dict[str, Any]]:
-        """무작위 샘플 선택"""
-        return self.load(types=types, total_samples=count)
+    def get_random_sample(self,
+                          count: int = 1,
+                          types: Optional[List[int]] = None,
+                          random_seed: Optional[int] = None) -> List[AttackRow]:
+        """무작위 샘플 선택 (전체 데이터가 이미 로드된 경우 CSV를 다시 처리하지 않음)"""
+        if self.attacks and self.metadata.get('is_full'):
+            rng = random.Random(random_seed) if random_seed is not None else random
+            pool = [a for a in self.attacks if a.type in types] if types else self.attacks
+            sampled = rng.sample(pool, min(count, len(pool)))
+            # load()와 동일하게 선택된 샘플 기준으로 0부터 다시 번호 부여
+            return [replace(attack, index=idx) for idx, attack in enumerate(sampled)]
+        
+        return self.load(types=types, total_samples=count, random_seed=random_seed)
     
     def reset(self):
         """데이터 초기화"""
@@ -10,23 +10,106 @@ Gmail API 래퍼
 """
 
 import base64
+import logging
 import mimetypes
+import mmap
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
+from email.header import Header
+import httplib2
+import google_auth_httplib2
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from googleapiclient.model import JsonModel
 from typing import List, Dict, Any, Optional, Union
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 
+# 배치 요청 1회당 최대 메일 수 (Gmail 권장: 50 이하)
+BATCH_SIZE = 50
+
+# messages().get 부분 응답 필드 (헤더, 스니펫, 본문 데이터만 - 첨부 메타데이터 등 제외)
+_PART_FIELDS = 'mimeType,body/data'
+MESSAGE_FIELDS = (
+    'id,threadId,snippet,internalDate,'
+    f'payload({_PART_FIELDS},headers(name,value),'
+    f'parts({_PART_FIELDS},parts({_PART_FIELDS},parts({_PART_FIELDS}))))'
+)
+
+# 개별 재조회 동시 요청 수 (사용자당 250 quota units/s, messages.get = 5 units)
+FETCH_WORKERS = 8
+
+# 🔄 테스트용: 실제 attacker 이메일로 치환할 플레이스홀더 주소
+_PLACEHOLDER_EMAILS = frozenset({
+    'contact@contact.com',
+    'attacker@evil.com',
+    'attacker@gmail.com',
+    'hacker@evil.com',
+    'test@test.com',
+    'malicious@example.com'
+})
+
+
+@lru_cache(maxsize=1)
+def _attacker_email() -> Optional[str]:
+    """config의 ATTACKER_EMAIL (최초 치환 시 1회만 로드)"""
+    # src.config는 import 시 .env 검증을 수행하므로 모듈 로드 시점에 가져오지 않음
+    from src.config import ATTACKER_EMAIL
+    return ATTACKER_EMAIL
+
+
+@lru_cache(maxsize=1)
+def _gmail_discovery_document() -> str:
+    """패키지에 포함된 Gmail v1 discovery 문서 (프로세스당 1회 로드)"""
+    # 파싱된 dict는 build 과정에서 수정되므로 인스턴스 간에 공유하지 않고 문자열로 캐시
+    return discovery_cache.get_static_doc('gmail', 'v1')
+
+
+def _has_line_break(value: str) -> bool:
+    """헤더 값에 CR/LF 포함 여부"""
+    return '\r' in value or '\n' in value
+
+
+class _OrjsonModel(JsonModel):
+    """
+    orjson으로 응답 본문을 파싱하는 JsonModel
+    
+    요청 직렬화는 기본 JsonModel(json.dumps, ASCII 이스케이프)을 그대로 사용합니다.
+    googleapiclient는 str 본문 길이로 Content-Length를 정하고 http.client는 latin-1로
+    인코딩하므로, 한글 등 non-ASCII가 그대로 들어간 본문은 전송에 실패합니다.
+    """
+    
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return content.decode('utf-8') if isinstance(content, bytes) else content
+        if self._data_wrapper and 'data' in body:
+            body = body['data']
+        return body
+
+
+# orjson 미설치 시 기본 JsonModel 사용
+_JSON_MODEL = _OrjsonModel() if orjson else JsonModel()
+
 
 class GmailTools:
     """Gmail API 래퍼"""
@@ -47,7 +130,11 @@ class GmailTools:
             self.account_type = 'unknown'
         
         self.credentials = credentials
-        self.service = build('gmail', 'v1', credentials=credentials)
+        self.service = build_from_document(
+            _gmail_discovery_document(),
+            credentials=credentials,
+            model=_JSON_MODEL
+        )
         self._email = None
     
     def _load_credentials(self, account_type: str) -> Credentials:
@@ -95,10 +182,20 @@ class GmailTools:
         return creds
     
     def get_email(self) -> str:
-        """현재 계정의 이메일 주소 반환"""
+        """
+        현재 로그인된 Gmail 이메일 주소 반환 (최초 1회 조회 후 캐시)
+        
+        Returns:
+            str: 이메일 주소 (예: 'user@gmail.com'), 조회 실패 시 ''
+        """
         if self._email is None:
-            profile = self.service.users().getProfile(userId='me').execute()
+            try:
+                profile = self.service.users().getProfile(userId='me').execute()
+            except Exception as e:
+                logger.error("❌ 이메일 주소 조회 오류: %s", e, exc_info=True)
+                return ''
             self._email = profile.get('emailAddress', '')
+            logger.info("✅ 현재 계정: %s", self._email)
         return self._email
     
     def get_unread_emails(self, max_results: int = 10) -> List[Dict[str, Any]]:
@@ -133,37 +230,14 @@ class GmailTools:
             
             messages = results.get('messages', [])
             
-            # 메일 상세 정보 조회
-            email_list = []
-            for msg in messages:
-                email_detail = self.read_email(msg['id'])
-                if email_detail:
-                    email_list.append(email_detail)
-            
-            return email_list
+            # 메일 상세 정보 조회 (배치 요청)
+            return self._read_emails_batch([msg['id'] for msg in messages])
         
         except Exception as e:
-            print(f"❌ 읽지 않은 메일 조회 오류: {e}")
+            logger.error("❌ 읽지 않은 메일 조회 오류: %s", e, exc_info=True)
             return []
     
 
-    def get_email(self) -> str:
-        """
-        현재 로그인된 Gmail 이메일 주소 반환
-        
-        Returns:
-            str: 이메일 주소 (예: 'user@gmail.com')
-        """
-        try:
-            profile = self.service.users().getProfile(userId='me').execute()
-            email = profile.get('emailAddress', '')
-            print(f"✅ 현재 계정: {email}")
-            return email
-        
-        except Exception as e:
-            print(f"❌ 이메일 주소 조회 오류: {e}")
-            return ''
-
     def search_emails(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """
         메일 검색
@@ -185,18 +259,33 @@ class GmailTools:
             
             messages = results.get('messages', [])
             
-            email_list = []
-            for msg in messages:
-                email_detail = self.read_email(msg['id'])
-                if email_detail:
-                    email_list.append(email_detail)
-            
-            return email_list
+            return self._read_emails_batch([msg['id'] for msg in messages])
         
         except Exception as e:
-            print(f"❌ 메일 검색 오류: {e}")
+            logger.error("❌ 메일 검색 오류: %s", e, exc_info=True)
             return []
     
+    def list_message_ids(self, query: str, max_results: int = 10) -> List[str]:
+        """
+        검색 쿼리에 맞는 메일 ID 목록만 조회 (메일 내용은 가져오지 않음)
+        
+        Args:
+            query: 검색 쿼리 (예: 'from:victim@gmail.com')
+            max_results: 최대 조회 개수
+        
+        Returns:
+            List[str]: 메일 ID 목록
+        """
+        
+        results = self.service.users().messages().list(
+            userId='me',
+            q=query,
+            maxResults=max_results,
+            fields='messages/id'
+        ).execute()
+        
+        return [msg['id'] for msg in results.get('messages', [])]
+    
     def read_email(self, message_id: str) -> Optional[Dict[str, Any]]:
         """
         메일 내용 읽기
@@ -219,36 +308,12 @@ class GmailTools:
         """
         
         try:
-            message = self.service.users().messages().get(
-                userId='me',
-                id=message_id,
-                format='full'
-            ).execute()
-            
-            headers = message['payload']['headers']
-            
-            # 헤더에서 정보 추출
-            sender = self._get_header_value(headers, 'From')
-            to = self._get_header_value(headers, 'To')
-            subject = self._get_header_value(headers, 'Subject')
-            snippet = message.get('snippet', '')
+            message = self._message_request(message_id).execute()
             
-            # 본문 추출
-            body = self._get_body(message['payload'])
-            
-            return {
-                'id': message['id'],
-                'threadId': message['threadId'],
-                'sender': sender,
-                'to': to,
-                'subject': subject,
-                'snippet': snippet,
-                'body': body,
-                'internalDate': message.get('internalDate')
-            }
+            return self._parse_message(message)
         
         except Exception as e:
-            print(f"❌ 메일 읽기 오류 (ID: {message_id}): {e}")
+            logger.error("❌ 메일 읽기 오류 (ID: %s): %s", message_id, e, exc_info=True)
             return None
     
     def send_email(
@@ -277,45 +342,42 @@ class GmailTools:
         
         try:
             # 🔄 테스트용: 플레이스홀더 이메일을 실제 attacker 이메일로 치환
-            placeholder_emails = [
-                'contact@contact.com',
-                'attacker@evil.com',
-                'attacker@gmail.com',
-                'hacker@evil.com',
-                'test@test.com',
-                'malicious@example.com'
-            ]
-            
-            if to in placeholder_emails:
-                # config에서 ATTACKER_EMAIL 가져오기
-                from src.config import ATTACKER_EMAIL
-                if ATTACKER_EMAIL:
-                    print(f"🔄 이메일 치환: {to} → {ATTACKER_EMAIL}")
-                    to = ATTACKER_EMAIL
+            if to in _PLACEHOLDER_EMAILS:
+                attacker_email = _attacker_email()
+                if attacker_email:
+                    logger.info("🔄 이메일 치환: %s → %s", to, attacker_email)
+                    to = attacker_email
             
-            # 메일 구성
-            message = MIMEMultipart()
-            message['To'] = to
-            message['Subject'] = subject
-            if cc:
-                message['Cc'] = cc
-            if bcc:
-                message['Bcc'] = bcc
-            message.attach(MIMEText(body, 'plain'))
-            
-            # 첨부 파일 추가
-            if attachments:
-                for file_path in attachments:
-                    self._attach_file(message, file_path)
+            if not attachments and not cc and not bcc and not _has_line_break(to):
+                # 첨부/참조 없는 일반 메일: MIME 객체 없이 바이트 직접 구성
+                raw_bytes = self._build_plain_message(to, subject, body)
+            else:
+                # 메일 구성
+                message = MIMEMultipart()
+                message['To'] = to
+                message['Subject'] = subject
+                if cc:
+                    message['Cc'] = cc
+                if bcc:
+                    message['Bcc'] = bcc
+                message.attach(MIMEText(body, 'plain'))
+                
+                # 첨부 파일 추가
+                if attachments:
+                    for file_path in attachments:
+                        self._attach_file(message, file_path)
+                
+                raw_bytes = message.as_bytes()
             
-            # 메일 전송
-            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+            # 메일 전송 (base64 출력은 항상 ASCII → UTF-8 검증 없이 디코드)
+            raw_message = base64.urlsafe_b64encode(raw_bytes).decode('ascii')
+            del raw_bytes  # 전송 중에는 인코딩 전 원본을 유지하지 않음
             result = self.service.users().messages().send(
                 userId='me',
                 body={'raw': raw_message}
             ).execute()
             
-            print(f"✅ 메일 전송 성공: {to}")
+            logger.info("✅ 메일 전송 성공: %s", to)
             return {
                 'success': True,
                 'message_id': result.get('id'),
@@ -323,7 +385,7 @@ class GmailTools:
             }
         
         except Exception as e:
-            print(f"❌ 메일 전송 오류: {e}")
+            logger.error("❌ 메일 전송 오류: %s", e, exc_info=True)
             return {
                 'success': False,
                 'message_id': None,
@@ -347,11 +409,11 @@ class GmailTools:
                 id=message_id
             ).execute()
             
-            print(f"✅ 메일 삭제 성공: {message_id}")
+            logger.info("✅ 메일 삭제 성공: %s", message_id)
             return True
         
         except Exception as e:
-            print(f"❌ 메일 삭제 오류: {e}")
+            logger.error("❌ 메일 삭제 오류: %s", e, exc_info=True)
             return False
     
     def mark_as_read(self, message_id: str) -> bool:
@@ -372,11 +434,11 @@ class GmailTools:
                 body={'removeLabelIds': ['UNREAD']}
             ).execute()
             
-            print(f"✅ 메일 읽음 표시: {message_id}")
+            logger.info("✅ 메일 읽음 표시: %s", message_id)
             return True
         
         except Exception as e:
-            print(f"❌ 읽음 표시 오류: {e}")
+            logger.error("❌ 읽음 표시 오류: %s", e, exc_info=True)
             return False
     
     def trash_email(self, message_id: str) -> bool:
@@ -396,39 +458,153 @@ class GmailTools:
                 id=message_id
             ).execute()
             
-            print(f"✅ 메일 휴지통 이동: {message_id}")
+            logger.info("✅ 메일 휴지통 이동: %s", message_id)
             return True
         
         except Exception as e:
-            print(f"❌ 휴지통 이동 오류: {e}")
+            logger.error("❌ 휴지통 이동 오류: %s", e, exc_info=True)
             return False
     
     # 헬퍼 메서드
     
-    def _get_header_value(self, headers: List[Dict], name: str) -> str:
-        """헤더에서 값 추출"""
+    def _read_emails_batch(self, message_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        여러 메일의 상세 정보를 BatchHttpRequest로 한 번에 조회
         
-        for header in headers:
-            if header['name'] == name:
-                return header['value']
+        Args:
+            message_ids: 메일 ID 리스트
         
-        return ''
+        Returns:
+            List[Dict]: read_email과 같은 형식의 메일 목록 (입력 순서 유지, 실패한 메일 제외)
+        """
+        
+        messages = {}
+        
+        def on_response(request_id, response, exception):
+            if exception is None:
+                messages[request_id] = response
+        
+        for start in range(0, len(message_ids), BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for message_id in message_ids[start:start + BATCH_SIZE]:
+                batch.add(self._message_request(message_id), request_id=message_id)
+            batch.execute()
+        
+        # 배치 안에서 실패한 메일(rate limit 등)은 개별 요청으로 병렬 재조회
+        failed_ids = [message_id for message_id in message_ids if message_id not in messages]
+        if failed_ids:
+            messages.update(self._fetch_messages_parallel(failed_ids))
+        
+        email_list = []
+        for message_id in message_ids:
+            if message_id not in messages:
+                continue
+            try:
+                email_list.append(self._parse_message(messages[message_id]))
+            except Exception as e:
+                logger.error("❌ 메일 읽기 오류 (ID: %s): %s", message_id, e, exc_info=True)
+        
+        return email_list
+    
+    def _fetch_messages_parallel(self, message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        messages().get을 ThreadPoolExecutor로 병렬 실행
+        
+        httplib2.Http는 스레드 간 공유할 수 없으므로 워커 스레드마다
+        별도의 AuthorizedHttp를 만들어 사용합니다.
+        """
+        
+        local = threading.local()
+        
+        def fetch(message_id):
+            if not hasattr(local, 'http'):
+                local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            try:
+                message = self._message_request(message_id).execute(http=local.http)
+                return message_id, message
+            except Exception as e:
+                logger.error("❌ 메일 읽기 오류 (ID: %s): %s", message_id, e, exc_info=True)
+                return message_id, None
+        
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(message_ids))) as executor:
+            return {
+                message_id: message
+                for message_id, message in executor.map(fetch, message_ids)
+                if message is not None
+            }
+    
+    def _message_request(self, message_id: str):
+        """필요한 필드만 받는 messages().get 요청 생성"""
+        return self.service.users().messages().get(
+            userId='me',
+            id=message_id,
+            format='full',
+            fields=MESSAGE_FIELDS
+        )
+    
+    def _parse_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """messages().get 응답 → 메일 상세 정보 Dict"""
+        
+        # 헤더에서 정보 추출 (같은 이름이 여러 개면 첫 번째 값 사용)
+        headers = {h['name']: h['value'] for h in reversed(message['payload']['headers'])}
+        sender = headers.get('From', '')
+        to = headers.get('To', '')
+        subject = headers.get('Subject', '')
+        snippet = message.get('snippet', '')
+        
+        # 본문 추출
+        body = self._get_body(message['payload'])
+        
+        return {
+            'id': message['id'],
+            'threadId': message['threadId'],
+            'sender': sender,
+            'to': to,
+            'subject': subject,
+            'snippet': snippet,
+            'body': body,
+            'internalDate': message.get('internalDate')
+        }
+    
+    @staticmethod
+    def _build_plain_message(to: str, subject: str, body: str) -> bytes:
+        """text/plain 단일 파트 RFC 5322 메시지 바이트 생성"""
+        
+        # 줄바꿈이 든 수신자는 MIME 경로로 보내므로 여기서는 허용하지 않음
+        if _has_line_break(to):
+            raise ValueError("수신자 주소에 줄바꿈 문자를 사용할 수 없습니다")
+        
+        # 비ASCII/여러 줄 제목은 RFC 2047 인코딩 (헤더 주입 방지, 접힌 줄은 CRLF로 구분)
+        if not subject.isascii() or _has_line_break(subject):
+            subject = Header(subject, 'utf-8', header_name='Subject').encode(linesep='\r\n')
+        
+        return (
+            f"To: {to}\r\n"
+            f"Subject: {subject}\r\n"
+            "MIME-Version: 1.0\r\n"
+            "Content-Type: text/plain; charset=utf-8\r\n"
+            "Content-Transfer-Encoding: 8bit\r\n"
+            "\r\n"
+            f"{body}"
+        ).encode('utf-8')
     
     def _get_body(self, payload: Dict) -> str:
-        """메일 본문 추출"""
-        
-        if 'parts' in payload:
-            # multipart 메일
-            for part in payload['parts']:
-                if part['mimeType'] == 'text/plain':
-                    data = part['body'].get('data', '')
-                    if data:
-                        return base64.urlsafe_b64decode(data).decode('utf-8')
-        else:
+        """메일 본문 추출 (중첩 multipart는 문서 순서대로 첫 text/plain 파트 사용)"""
+        
+        if 'parts' not in payload:
             # 단순 텍스트 메일
-            data = payload['body'].get('data', '')
-            if data:
-                return base64.urlsafe_b64decode(data).decode('utf-8')
+            data = payload.get('body', {}).get('data')
+            return base64.urlsafe_b64decode(data).decode('utf-8', 'replace') if data else ''
+        
+        # multipart 메일
+        stack = [payload]
+        while stack:
+            part = stack.pop()
+            if part.get('mimeType') == 'text/plain':
+                data = part.get('body', {}).get('data')
+                if data:
+                    return base64.urlsafe_b64decode(data).decode('utf-8', 'replace')
+            stack.extend(reversed(part.get('parts', ())))
         
         return ''
     
@@ -436,16 +612,22 @@ class GmailTools:
         """첨부 파일 추가"""
         
         try:
+            part = MIMEBase('application', 'octet-stream')
             with open(file_path, 'rb') as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
+                if os.fstat(attachment.fileno()).st_size:
+                    # 파일을 메모리에 읽어들이지 않고 매핑된 영역에서 바로 인코딩
+                    with mmap.mmap(attachment.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        encoded = base64.encodebytes(mm).decode('ascii')
+                else:
+                    encoded = ''  # 빈 파일은 mmap 불가
             
-            encoders.encode_base64(part)
-            part.add_header('Content-Disposition', f'attachment; filename= {file_path}')
+            part.set_payload(encoded)
+            part['Content-Transfer-Encoding'] = 'base64'
+            part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(file_path))
             message.attach(part)
         
         except Exception as e:
-            print(f"❌ 파일 첨부 오류 ({file_path}): {e}")
+            logger.error("❌ 파일 첨부 오류 (%s): %s", file_path, e, exc_info=True)
     
     def get_service(self):
         """Gmail API 서비스 객체 반환 (고급 사용)"""
@@ -0,0 +1,66 @@
+"""
+GmailTools._build_plain_message 테스트
+
+데이터셋에는 줄바꿈이 포함된 제목이 있으므로, 이런 제목도 RFC 2047로 인코딩되어
+헤더가 깨지지 않고 email 파서로 다시 읽히는지 확인합니다.
+"""
+
+import csv
+import email
+import sys
+from email.header import decode_header, make_header
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.gmail.tools import GmailTools
+
+DATASET = Path(__file__).parent.parent / 'data' / 'attack_dataset.csv'
+
+
+def _multiline_subjects():
+    """데이터셋에서 CR/LF가 포함된 제목"""
+    with open(DATASET, encoding='utf-8-sig', newline='') as f:
+        return [row['subject'] for row in csv.DictReader(f) if '\r' in row['subject'] or '\n' in row['subject']]
+
+
+def _roundtrip(subject: str, body: str = '본문\n'):
+    raw = GmailTools._build_plain_message('attacker@example.com', subject, body)
+    header_block = raw.split(b'\r\n\r\n', 1)[0]
+    # 헤더의 모든 줄은 CRLF로 끝나야 함 (단독 LF/CR 없음)
+    assert b'\n' not in header_block.replace(b'\r\n', b'')
+    assert b'\r' not in header_block.replace(b'\r\n', b'')
+    return email.message_from_bytes(raw)
+
+
+def test_dataset_multiline_subject_roundtrip():
+    subjects = _multiline_subjects()
+    assert subjects
+
+    message = _roundtrip(subjects[0])
+
+    assert list(message.keys()) == ['To', 'Subject', 'MIME-Version', 'Content-Type', 'Content-Transfer-Encoding']
+    assert message['To'] == 'attacker@example.com'
+    # 줄바꿈은 접힘 공백이 되므로 단어 단위로 비교
+    assert str(make_header(decode_header(message['Subject']))).split() == subjects[0].split()
+    assert message.get_payload(decode=True).decode('utf-8') == '본문\n'
+
+
+def test_all_dataset_multiline_subjects_are_sendable():
+    for subject in _multiline_subjects():
+        message = _roundtrip(subject)
+        assert str(make_header(decode_header(message['Subject']))).split() == subject.split()
+
+
+def test_multiline_subject_cannot_inject_headers():
+    message = _roundtrip('Hello\r\nBcc: victim@example.com')
+
+    assert message['Bcc'] is None
+    assert 'Bcc: victim@example.com' in str(make_header(decode_header(message['Subject'])))
+
+
+def test_recipient_with_line_break_is_rejected():
+    with pytest.raises(ValueError):
+        GmailTools._build_plain_message('a@example.com\r\nBcc: b@example.com', 'subject', 'body')
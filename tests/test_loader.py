@@ -0,0 +1,59 @@
+"""
+AttackDataLoader 대용량(스트리밍) 샘플링 경로 테스트
+
+번들 데이터셋은 STREAMING_THRESHOLD_BYTES보다 작으므로 임계값을 0으로 낮춰
+_sample_csv_streaming 경로를 강제로 실행합니다.
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data import loader as loader_module
+from src.data.loader import AttackDataLoader
+
+
+@pytest.fixture
+def streaming_loader(monkeypatch):
+    """스트리밍 경로만 사용하는 로더 (파싱 캐시 경로가 호출되면 실패)"""
+    monkeypatch.setattr(loader_module, 'STREAMING_THRESHOLD_BYTES', 0)
+
+    def _fail(self):
+        raise AssertionError("스트리밍 경로 대신 전체 파싱 경로가 실행됨")
+
+    monkeypatch.setattr(AttackDataLoader, '_read_dataset', _fail)
+    return AttackDataLoader()
+
+
+def test_streaming_total_samples_size(streaming_loader):
+    attacks = streaming_loader.load(total_samples=10, random_seed=0)
+
+    assert len(attacks) == 10
+    assert [a.index for a in attacks] == list(range(10))
+    assert streaming_loader.metadata['is_full'] is False
+
+
+def test_streaming_samples_per_type_filters_types(streaming_loader):
+    attacks = streaming_loader.load(types=[1, 3], samples_per_type=4, random_seed=0)
+
+    assert Counter(a.type for a in attacks) == {1: 4, 3: 4}
+
+
+def test_streaming_total_samples_filters_types(streaming_loader):
+    attacks = streaming_loader.load(types=[6], total_samples=5, random_seed=0)
+
+    assert len(attacks) == 5
+    assert {a.type for a in attacks} == {6}
+
+
+def test_streaming_is_deterministic_with_seed(streaming_loader):
+    first = [a.email_subject for a in streaming_loader.load(total_samples=20, random_seed=42)]
+    second = [a.email_subject for a in streaming_loader.load(total_samples=20, random_seed=42)]
+    other = [a.email_subject for a in streaming_loader.load(total_samples=20, random_seed=7)]
+
+    assert first == second
+    assert first != other